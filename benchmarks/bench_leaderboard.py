@@ -0,0 +1,104 @@
+#!/usr/bin/env python
+#
+# Jumper Plugin for BigBrotherBot(B3) (www.bigbrotherbot.net)
+# Copyright (C) 2013 Fenix <fenix@urbanterror.info)
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the Free Software
+# Foundation, Inc., 51 Franklin St, Fifth Floor, Boston, MA  02110-1301  USA
+
+"""
+Measure the JumpLeaderboard operations performed on the run-finish path
+(personal best update, rank lookup, map record check) and by !top on maps
+with many runners per way.
+
+B3 must be importable (run from the B3 directory or set PYTHONPATH):
+
+    python bench_leaderboard.py --runners 10000 50000 --ways 3
+"""
+
+from __future__ import print_function
+
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'extplugins'))
+
+from jumper import JumpLeaderboard
+
+
+def percentiles(timings):
+    """
+    Return p50, p95 and max (in microseconds) of the given timings
+    """
+    timings.sort()
+    return timings[len(timings) // 2], timings[int(len(timings) * 0.95)], timings[-1]
+
+
+def bench(runners, ways, samples, rnd):
+    """
+    Return the timings of every leaderboard operation for the given map size
+    """
+    leaderboard = JumpLeaderboard('ut4_bench')
+    start = time.time()
+    for client_id in range(1, runners + 1):
+        for way_id in range(1, ways + 1):
+            leaderboard.update(client_id, way_id, rnd.randint(5000, 600000), 1380000000, 1380000000, None)
+    load = time.time() - start
+
+    results = {'update': [], 'rank': [], 'maprecord': [], 'top': []}
+    for i in range(samples):
+        client_id = rnd.randint(1, runners)
+        way_id = rnd.randint(1, ways)
+        way_time = leaderboard.get(client_id, way_id)['way_time'] - rnd.randint(1, 5000)
+
+        t = time.time()
+        leaderboard.update(client_id, way_id, way_time, 1380000000, 1380000000 + i, None)
+        results['update'].append((time.time() - t) * 1000000)
+
+        t = time.time()
+        leaderboard.getRank(way_id, way_time)
+        results['rank'].append((time.time() - t) * 1000000)
+
+        t = time.time()
+        leaderboard.isMapRecord(way_id, way_time)
+        results['maprecord'].append((time.time() - t) * 1000000)
+
+        t = time.time()
+        leaderboard.getTop(way_id, rnd.randint(0, runners // 5) * 5, 5)
+        results['top'].append((time.time() - t) * 1000000)
+
+    return load, results
+
+
+def main():
+    parser = argparse.ArgumentParser(description='jumper leaderboard benchmark')
+    parser.add_argument('--runners', type=int, nargs='+', default=[1000, 10000, 50000])
+    parser.add_argument('--ways', type=int, default=3)
+    parser.add_argument('--samples', type=int, default=2000)
+    parser.add_argument('--seed', type=int, default=1)
+    args = parser.parse_args()
+
+    print('%-8s %-10s %10s %10s %10s' % ('runners', 'operation', 'p50', 'p95', 'max'))
+    for runners in args.runners:
+        load, results = bench(runners, args.ways, args.samples, random.Random(args.seed))
+        print('%-8d %-10s %9.1fms' % (runners, 'load', load * 1000))
+        for name in ('update', 'rank', 'maprecord', 'top'):
+            print('%-8d %-10s %8.1fus %8.1fus %8.1fus' % ((runners, name) + percentiles(results[name])))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,146 @@
+#!/usr/bin/env python
+#
+# Jumper Plugin for BigBrotherBot(B3) (www.bigbrotherbot.net)
+# Copyright (C) 2013 Fenix <fenix@urbanterror.info)
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the Free Software
+# Foundation, Inc., 51 Franklin St, Fifth Floor, Boston, MA  02110-1301  USA
+
+"""
+Compare the !mapinfo name lookup done by JumpMapIndex with the previous
+implementation (regex cleanup of the whole catalogue + getStuffSoundingLike
+on every call).
+
+B3 must be importable (run from the B3 directory or set PYTHONPATH). The map
+catalogue is read from the plugin cache file when given, otherwise a synthetic
+catalogue is generated from the seed:
+
+    python bench_mapindex.py --catalogue /path/to/b3/conf/jumper_maps.json
+"""
+
+from __future__ import print_function
+
+import argparse
+import json
+import os
+import random
+import re
+import string
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'extplugins'))
+
+from b3.functions import getStuffSoundingLike
+from jumper import JumpMapIndex
+
+
+def legacy(mapname, supportedMaps):
+    """
+    The lookup performed by JumperPlugin.getMapsFromListSoundingLike up to version 2.1.1
+    """
+    wanted_map = mapname.lower()
+    if wanted_map in supportedMaps:
+        return wanted_map
+
+    cleaned_supportedMaps = {}
+    for map_name in supportedMaps:
+        cleaned_supportedMaps[re.sub("^ut4?_", '', map_name, count=1)] = map_name
+
+    if wanted_map in cleaned_supportedMaps:
+        return cleaned_supportedMaps[wanted_map]
+
+    cleaned_wanted_map = re.sub("^ut4?_", '', wanted_map, count=1)
+    matches = [cleaned_supportedMaps[match] for match in getStuffSoundingLike(cleaned_wanted_map, cleaned_supportedMaps.keys())]
+    if len(matches) == 1:
+        return matches[0]
+    return matches
+
+
+def catalogue(path, size, rnd):
+    """
+    Return the list of map names to index
+    """
+    if path:
+        with open(path, 'r') as f:
+            return list(json.load(f)['maps'].keys())
+
+    syllables = ['ka', 'ru', 'jump', 'zen', 'to', 'mi', 'sky', 'fall', 'ice', 'neo', 'lo', 'ra', 'tek', 'vo']
+    names = set()
+    while len(names) < size:
+        name = ''.join(rnd.choice(syllables) for _ in range(rnd.randint(2, 4)))
+        names.add('%s%s' % (rnd.choice(['ut4_', 'ut4_', 'ut_', '']), name))
+    return sorted(names)
+
+
+def queries(names, count, rnd):
+    """
+    Build a mix of exact, prefix, misspelled and unknown lookups
+    """
+    result = []
+    for i in range(count):
+        name = re.sub('^ut4?_', '', rnd.choice(names))
+        kind = i % 4
+        if kind == 0:
+            result.append(name)
+        elif kind == 1:
+            result.append(name[:max(2, len(name) // 2)])
+        elif kind == 2:
+            pos = rnd.randint(0, len(name) - 1)
+            result.append(name[:pos] + rnd.choice(string.ascii_lowercase) + name[pos + 1:])
+        else:
+            result.append(''.join(rnd.choice(string.ascii_lowercase) for _ in range(rnd.randint(3, 8))))
+    return result
+
+
+def timeit(func, wanted):
+    """
+    Return the per-lookup latency (in microseconds) as sorted list
+    """
+    timings = []
+    for name in wanted:
+        start = time.time()
+        func(name)
+        timings.append((time.time() - start) * 1000000)
+    timings.sort()
+    return timings
+
+
+def main():
+    parser = argparse.ArgumentParser(description='!mapinfo lookup benchmark')
+    parser.add_argument('--catalogue', help='jumper map catalogue cache file')
+    parser.add_argument('--maps', type=int, default=5000, help='synthetic catalogue size')
+    parser.add_argument('--queries', type=int, default=400)
+    parser.add_argument('--seed', type=int, default=1)
+    args = parser.parse_args()
+
+    rnd = random.Random(args.seed)
+    names = catalogue(args.catalogue, args.maps, rnd)
+    wanted = queries(names, args.queries, rnd)
+
+    start = time.time()
+    index = JumpMapIndex(names)
+    print('catalogue: %d maps, index built in %.1fms' % (len(names), (time.time() - start) * 1000))
+
+    results = [('legacy', timeit(lambda x: legacy(x, names), wanted)),
+               ('index', timeit(index.search, wanted))]
+
+    print('%-8s %12s %12s %12s' % ('lookup', 'p50', 'p95', 'max'))
+    for label, timings in results:
+        print('%-8s %10.1fus %10.1fus %10.1fus' % (label, timings[len(timings) // 2],
+                                                   timings[int(len(timings) * 0.95)], timings[-1]))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,157 @@
+#!/usr/bin/env python
+#
+# Jumper Plugin for BigBrotherBot(B3) (www.bigbrotherbot.net)
+# Copyright (C) 2013 Fenix <fenix@urbanterror.info)
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the Free Software
+# Foundation, Inc., 51 Franklin St, Fifth Floor, Boston, MA  02110-1301  USA
+
+"""
+Measure the latency of the jumper plugin queries on the old jumpruns schema
+(MyISAM, primary key only) and on the migrated one (InnoDB, unique key on
+client/map/way and index on map/way/time).
+
+Both tables are created in the given MySQL database, seeded with the same
+pseudo-random rows and dropped at the end of the run:
+
+    python bench_schema.py --user b3 --passwd secret --db b3 --rows 1000000
+"""
+
+from __future__ import print_function
+
+import argparse
+import random
+import time
+
+import MySQLdb
+
+SCHEMA = {
+    'before': "CREATE TABLE `%s` ("
+              "`id` int(10) unsigned NOT NULL AUTO_INCREMENT, `client_id` int(10) unsigned NOT NULL, "
+              "`mapname` varchar(64) NOT NULL, `way_id` int(3) NOT NULL, `way_time` int(10) unsigned NOT NULL, "
+              "`time_add` int(10) unsigned NOT NULL, `time_edit` int(10) unsigned NOT NULL, `demo` varchar(128) DEFAULT NULL, "
+              "PRIMARY KEY (`id`)) ENGINE=MyISAM DEFAULT CHARSET=utf8",
+    'after': "CREATE TABLE `%s` ("
+             "`id` int(10) unsigned NOT NULL AUTO_INCREMENT, `client_id` int(10) unsigned NOT NULL, "
+             "`mapname` varchar(64) NOT NULL, `way_id` int(3) NOT NULL, `way_time` int(10) unsigned NOT NULL, "
+             "`time_add` int(10) unsigned NOT NULL, `time_edit` int(10) unsigned NOT NULL, `demo` varchar(128) DEFAULT NULL, "
+             "PRIMARY KEY (`id`), UNIQUE KEY `client_map_way` (`client_id`, `mapname`, `way_id`), "
+             "KEY `map_way_time` (`mapname`, `way_id`, `way_time`)) ENGINE=InnoDB DEFAULT CHARSET=utf8",
+}
+
+# The queries issued by the plugin on the run-finish path and by the commands.
+# 'select+write' is the old q1 followed by q5/q6, 'upsert' is the new q5
+QUERIES = {
+    'before': [
+        ('q1 personal record', ["SELECT * FROM `{t}` WHERE `client_id` = '{c}' AND `mapname` = '{m}' AND `way_id` = '{w}'"]),
+        ('q2 map record', ["SELECT * FROM `{t}` WHERE `mapname` = '{m}' AND `way_id` = '{w}' AND `way_time` < '{x}'"]),
+        ('q3 !maprecord', ["SELECT * FROM `{t}` WHERE `mapname` = '{m}' AND `way_time` IN (SELECT MIN(`way_time`) FROM `{t}` WHERE `mapname` = '{m}' GROUP BY `way_id`) ORDER BY `way_id` ASC"]),
+        ('q4 !record', ["SELECT * FROM `{t}` WHERE `client_id` = '{c}' AND `mapname` = '{m}' ORDER BY `way_id` ASC"]),
+        ('q8 leaderboard load', ["SELECT * FROM `{t}` WHERE `mapname` = '{m}'"]),
+        ('select+write', ["SELECT * FROM `{t}` WHERE `client_id` = '{c}' AND `mapname` = '{m}' AND `way_id` = '{w}'",
+                          "UPDATE `{t}` SET `way_time` = '{x}', `time_edit` = '{x}', `demo` = 'bench' WHERE `client_id` = '{c}' AND `mapname` = '{m}' AND `way_id` = '{w}'"]),
+    ],
+    'after': [
+        ('q1 personal record', ["SELECT * FROM `{t}` WHERE `client_id` = '{c}' AND `mapname` = '{m}' AND `way_id` = '{w}'"]),
+        ('q2 map record', ["SELECT * FROM `{t}` WHERE `mapname` = '{m}' AND `way_id` = '{w}' AND `way_time` < '{x}'"]),
+        ('q3 !maprecord', ["SELECT * FROM `{t}` WHERE `mapname` = '{m}' AND `way_time` IN (SELECT MIN(`way_time`) FROM `{t}` WHERE `mapname` = '{m}' GROUP BY `way_id`) ORDER BY `way_id` ASC"]),
+        ('q4 !record', ["SELECT * FROM `{t}` WHERE `client_id` = '{c}' AND `mapname` = '{m}' ORDER BY `way_id` ASC"]),
+        ('q8 leaderboard load', ["SELECT * FROM `{t}` WHERE `mapname` = '{m}'"]),
+        ('select+write', ["INSERT INTO `{t}` (`client_id`, `mapname`, `way_id`, `way_time`, `time_add`, `time_edit`, `demo`) "
+                          "VALUES ('{c}', '{m}', '{w}', '{x}', '{x}', '{x}', 'bench') "
+                          "ON DUPLICATE KEY UPDATE `time_edit` = IF(VALUES(`way_time`) < `way_time`, VALUES(`time_edit`), `time_edit`), "
+                          "`demo` = IF(VALUES(`way_time`) < `way_time`, VALUES(`demo`), `demo`), "
+                          "`way_time` = LEAST(`way_time`, VALUES(`way_time`))"]),
+    ],
+}
+
+
+def seed(cursor, table, rows, maps, ways, clients, rnd):
+    """
+    Fill the given table with unique (client, map, way) rows
+    """
+    seen = set()
+    batch = []
+    while len(seen) < rows:
+        key = (rnd.randint(1, clients), 'ut4_bench_%d' % rnd.randint(1, maps), rnd.randint(1, ways))
+        if key in seen:
+            continue
+        seen.add(key)
+        batch.append(key + (rnd.randint(5000, 600000), 1380000000, 1380000000))
+        if len(batch) == 5000 or len(seen) == rows:
+            cursor.executemany("INSERT INTO `" + table + "` (`client_id`, `mapname`, `way_id`, `way_time`, `time_add`, `time_edit`) "
+                               "VALUES (%s, %s, %s, %s, %s, %s)", batch)
+            batch = []
+
+
+def measure(cursor, table, queries, samples, maps, ways, clients, rnd):
+    """
+    Return the median and 95th percentile latency (ms) of every query
+    """
+    results = []
+    for name, statements in queries:
+        timings = []
+        for _ in range(samples):
+            params = {'t': table, 'c': rnd.randint(1, clients), 'm': 'ut4_bench_%d' % rnd.randint(1, maps),
+                      'w': rnd.randint(1, ways), 'x': rnd.randint(5000, 600000)}
+            start = time.time()
+            for sql in statements:
+                cursor.execute(sql.format(**params))
+                cursor.fetchall()
+            timings.append((time.time() - start) * 1000)
+        timings.sort()
+        results.append((name, timings[len(timings) // 2], timings[int(len(timings) * 0.95)]))
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description='jumpruns schema benchmark')
+    parser.add_argument('--host', default='localhost')
+    parser.add_argument('--port', type=int, default=3306)
+    parser.add_argument('--user', default='b3')
+    parser.add_argument('--passwd', default='')
+    parser.add_argument('--db', default='b3')
+    parser.add_argument('--rows', type=int, default=1000000)
+    parser.add_argument('--maps', type=int, default=2000)
+    parser.add_argument('--ways', type=int, default=5)
+    parser.add_argument('--clients', type=int, default=50000)
+    parser.add_argument('--samples', type=int, default=50)
+    parser.add_argument('--seed', type=int, default=1)
+    args = parser.parse_args()
+
+    conn = MySQLdb.connect(host=args.host, port=args.port, user=args.user, passwd=args.passwd, db=args.db)
+    conn.autocommit(True)
+    cursor = conn.cursor()
+
+    report = {}
+    for label in ('before', 'after'):
+        table = 'jumpruns_bench_%s' % label
+        cursor.execute("DROP TABLE IF EXISTS `%s`" % table)
+        cursor.execute(SCHEMA[label] % table)
+        start = time.time()
+        seed(cursor, table, args.rows, args.maps, args.ways, args.clients, random.Random(args.seed))
+        print('seeded %s with %d rows in %.1fs' % (table, args.rows, time.time() - start))
+        report[label] = measure(cursor, table, QUERIES[label], args.samples,
+                                args.maps, args.ways, args.clients, random.Random(args.seed))
+        cursor.execute("DROP TABLE `%s`" % table)
+
+    print('%-22s %12s %12s %12s %12s' % ('query', 'before p50', 'before p95', 'after p50', 'after p95'))
+    for (name, b50, b95), (_, a50, a95) in zip(report['before'], report['after']):
+        print('%-22s %10.3fms %10.3fms %10.3fms %10.3fms' % (name, b50, b95, a50, a95))
+
+    conn.close()
+
+
+if __name__ == '__main__':
+    main()
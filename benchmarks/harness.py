@@ -0,0 +1,723 @@
+#!/usr/bin/env python
+#
+# Jumper Plugin for BigBrotherBot(B3) (www.bigbrotherbot.net)
+# Copyright (C) 2013 Fenix <fenix@urbanterror.info)
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the Free Software
+# Foundation, Inc., 51 Franklin St, Fifth Floor, Boston, MA  02110-1301  USA
+
+"""
+Replay a synthetic event stream through JumperPlugin without a game server.
+
+The console, the clients and the admin plugin are replaced by fakes counting
+the rcon writes (demo commands, say and private messages), the B3 storage by
+an in-memory SQLite database counting the queries (the plugin statements are
+translated from the MySQL dialect). With --sqlite the plugin tables are stored
+in a SQLite database file using the plugin's own SQLite storage instead. Demo files are created in a temporary
+directory so the demo manager performs real filesystem work.
+
+With --workers the events are handled by the plugin event workers: the
+measures are then the dispatch latencies, and the order in which the events
+have been handled is checked (the events of a slot in the order they were
+fired, round starts and map changes alone after every event fired before
+them); the exit status is 1 when the order has been violated.
+
+The event stream (run start/stop/cancel, team change, disconnect, connect,
+round start, map change and the player commands) is generated from the seed,
+so two runs with the same arguments replay exactly the same events:
+
+    python harness.py --clients 300 --slots 64 --maps 40 --ways 3 --events 20000
+    python harness.py --seed 7 --json before.json
+
+B3 must be importable (run from the B3 directory or set PYTHONPATH).
+"""
+
+from __future__ import print_function
+
+import argparse
+import json
+import os
+import random
+import re
+import shutil
+import sqlite3
+import sys
+import tempfile
+import threading
+import time
+import xml.etree.ElementTree as ElementTree
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'extplugins'))
+
+import b3
+import b3.events
+
+from jumper import JumperPlugin
+
+# B3 table read by the plugin: the plugin tables are created by its own SQLite schema migrations
+CLIENTS = "CREATE TABLE `clients` (`id` INTEGER PRIMARY KEY, `name` TEXT, `guid` TEXT)"
+
+# Conflict target of the MySQL ON DUPLICATE KEY UPDATE statements
+UNIQUE = {
+    'jumpruns': '`client_id`, `mapname`, `way_id`',
+    'jumprecords': '`mapname`, `way_id`',
+    'jumpfleet': '`mapname`, `way_id`, `peer`',
+    'jumpsync': '`peer`',
+    'jumpsummary': '`mapname`, `way_id`, `client_id`',
+    'jumpprofiles': '`client_id`',
+}
+
+
+class Cursor(object):
+    """
+    Minimal b3.storage cursor over a list of rows
+    """
+    def __init__(self, rows, rowcount, lastrowid):
+        self.rows = rows
+        self.pos = 0
+        self.rowcount = rowcount
+        self.lastrowid = lastrowid
+        self.EOF = not rows
+
+    def getRow(self):
+        return self.rows[self.pos] if not self.EOF else {}
+
+    def getValue(self, key, default=None):
+        return self.getRow().get(key, default)
+
+    def moveNext(self):
+        self.pos += 1
+        self.EOF = self.pos >= len(self.rows)
+        return self.getRow()
+
+    def close(self):
+        self.rows = []
+
+
+class Storage(object):
+    """
+    In-memory SQLite stand-in for the B3 storage counting the executed queries
+    """
+    def __init__(self):
+        self.db = sqlite3.connect(':memory:', check_same_thread=False, isolation_level=None)
+        self.db.row_factory = sqlite3.Row
+        self.lock = threading.Lock()
+        self.queries = 0
+        self.db.execute(CLIENTS)
+        self.db.execute(JumperPlugin._sqlite['s1'])
+        for num, statements in enumerate(JumperPlugin._sqliteSchema):
+            for sql in statements:
+                self.db.execute(sql)
+            self.db.execute(JumperPlugin._sqlite['s3'], (num + 1, int(time.time())))
+
+    def translate(self, sql):
+        """
+        Rewrite the MySQL specific syntax used by the plugin
+        """
+        if sql == 'START TRANSACTION':
+            return 'BEGIN'
+        if 'ON DUPLICATE KEY UPDATE' in sql:
+            table = re.match(r"INSERT INTO `(\w+)`", sql).group(1)
+            sql = sql.replace('ON DUPLICATE KEY UPDATE', 'ON CONFLICT (%s) DO UPDATE SET' % UNIQUE[table])
+            sql = re.sub(r"VALUES\((`\w+`)\)", r"excluded.\1", sql)
+            sql = sql.replace('IF(', 'CASE WHEN ').replace('LEAST(', 'MIN(').replace('GREATEST(', 'MAX(')
+            sql = re.sub(r"CASE WHEN ([^,]+), ([^,]+), ([^)]+)\)", r"CASE WHEN \1 THEN \2 ELSE \3 END", sql)
+        sql = re.sub(r"int\(\d+\)( unsigned)?", 'INTEGER', sql)
+        sql = re.sub(r"varchar\(\d+\)", 'TEXT', sql)
+        sql = re.sub(r"\) ENGINE=\w+ DEFAULT CHARSET=\w+", ')', sql)
+        return sql.replace('INSERT IGNORE', 'INSERT OR IGNORE').replace('UNIX_TIMESTAMP()', "strftime('%s', 'now')")
+
+    def query(self, sql, data=None):
+        with self.lock:
+            self.queries += 1
+            cursor = self.db.execute(self.translate(sql), data or ())
+            rows = [dict(x) for x in cursor.fetchall()] if cursor.description else []
+            return Cursor(rows, cursor.rowcount, cursor.lastrowid)
+
+    def close(self):
+        pass
+
+
+class ClientVar(object):
+    def __init__(self, value):
+        self.value = value
+
+
+class Client(object):
+    """
+    Fake b3.clients.Client counting the private messages
+    """
+    def __init__(self, console, client_id, name):
+        self.console = console
+        self.id = client_id
+        self.name = name
+        self.guid = 'HARNESS%024d' % client_id
+        self.cid = None
+        self.maxLevel = 0
+        self.connected = False
+        self._vars = {}
+
+    def var(self, plugin, key, default=None):
+        return self._vars.setdefault(key, ClientVar(default))
+
+    def setvar(self, plugin, key, value):
+        self.var(plugin, key).value = value
+
+    def message(self, text):
+        self.console.count('message')
+
+
+class Clients(object):
+    def __init__(self):
+        self.slots = {}
+
+    def getList(self):
+        return self.slots.values()
+
+    def getByCID(self, cid):
+        return self.slots.get(cid)
+
+
+class Game(object):
+    def __init__(self, basepath, homepath):
+        self.mapName = None
+        self.fs_game = 'q3ut4'
+        self.fs_basepath = basepath
+        self.fs_homepath = homepath
+
+
+class Console(object):
+    """
+    Fake B3 parser: rcon writes are counted and startserverdemo demo files are created
+    """
+    gameName = 'iourt42'
+
+    def __init__(self, storage, homepath, demosize, loglevel):
+        self.storage = storage
+        self.game = Game(homepath, homepath)
+        self.clients = Clients()
+        self.homepath = homepath
+        self.demosize = demosize
+        self.loglevel = loglevel
+        self.clock = 1380000000.0
+        self.demos = 0
+        self.counters = {'write': 0, 'say': 0, 'message': 0, 'warning': 0, 'error': 0}
+        self.lock = threading.Lock()
+        self.plugins = {}
+
+    def count(self, name):
+        with self.lock:
+            self.counters[name] += 1
+
+    def rcon(self):
+        with self.lock:
+            return self.counters['write'] + self.counters['say'] + self.counters['message']
+
+    def time(self):
+        return int(self.clock)
+
+    def write(self, cmd, *args, **kwargs):
+        self.count('write')
+        if cmd.startswith('startserverdemo'):
+            # Demos are started by a background thread of the plugin: the file exists once the recording started
+            with self.lock:
+                self.demos += 1
+                filename = 'serverdemos/harness_%06d.urtdemo' % self.demos
+            with open(os.path.join(self.homepath, self.game.fs_game, filename), 'wb') as f:
+                f.write(b'\0' * self.demosize)
+            return 'startserverdemo: recording %s to %s' % (filename[12:-8], filename)
+        return ''
+
+    def say(self, text):
+        self.count('say')
+
+    def getCvar(self, name):
+        raise Exception('no rcon connection')
+
+    def getPlugin(self, name):
+        return self.plugins.get(name)
+
+    def registerHandler(self, event, plugin):
+        pass
+
+    def getEventID(self, name):
+        return name
+
+    def log(self, level, msg):
+        if level in self.counters:
+            self.count(level)
+        if self.loglevel or level in ('error', 'critical'):
+            sys.stderr.write('%s: %s\n' % (level.upper(), msg))
+
+    def debug(self, msg, *args, **kwargs):
+        if self.loglevel > 1:
+            self.log('debug', msg)
+
+    def verbose(self, msg, *args, **kwargs):
+        if self.loglevel > 1:
+            self.log('verbose', msg)
+
+    def info(self, msg, *args, **kwargs):
+        self.log('info', msg)
+
+    def warning(self, msg, *args, **kwargs):
+        self.log('warning', msg)
+
+    def error(self, msg, *args, **kwargs):
+        self.log('error', msg)
+
+    def critical(self, msg, *args, **kwargs):
+        self.log('critical', msg)
+
+    def exception(self, msg, *args, **kwargs):
+        self.log('error', msg)
+
+    def bot(self, msg, *args, **kwargs):
+        pass
+
+
+class Config(object):
+    """
+    Plugin configuration read from the shipped jumper.xml with overridden settings
+    """
+    def __init__(self, path, overrides):
+        self.data = {}
+        for section in ElementTree.parse(path).getroot().findall('settings'):
+            options = self.data.setdefault(section.get('name'), {})
+            for option in section.findall('set'):
+                options[option.get('name')] = (option.text or '').strip()
+        for section, options in overrides.items():
+            self.data.setdefault(section, {}).update(options)
+
+    def sections(self):
+        return self.data.keys()
+
+    def options(self, section):
+        return self.data[section].keys()
+
+    def has_option(self, section, option):
+        return option in self.data.get(section, {})
+
+    def get(self, section, option):
+        if not self.has_option(section, option):
+            raise KeyError('%s.%s' % (section, option))
+        return str(self.data[section][option])
+
+    def getint(self, section, option):
+        return int(self.get(section, option))
+
+    def getfloat(self, section, option):
+        return float(self.get(section, option))
+
+    def getboolean(self, section, option):
+        return self.get(section, option).lower() in ('1', 'yes', 'on', 'true')
+
+    def getpath(self, section, option):
+        return self.get(section, option)
+
+
+class Admin(object):
+    """
+    Fake admin plugin: commands are invoked directly by the replay
+    """
+    def __init__(self, console):
+        self.console = console
+
+    def registerCommand(self, plugin, command, level, handler, alias=None):
+        pass
+
+    def findClientPrompt(self, data, client):
+        for c in self.console.clients.getList():
+            if c.name.lower() == data.lower():
+                return c
+        client.message('No players found matching %s' % data)
+
+
+class Command(object):
+    loud = False
+
+    def sayLoudOrPM(self, client, text):
+        client.message(text)
+
+
+def generate(args):
+    """
+    Return the list of (kind, slot, data) events described by the arguments
+    """
+    rnd = random.Random(args.seed)
+    maps = ['ut4_harness_%03d' % i for i in range(args.maps)]
+    # Every player has a skill level so personal bests become rarer over time
+    skill = dict([(i, rnd.uniform(0.8, 2.0)) for i in range(1, args.clients + 1)])
+    offline = list(range(1, args.clients + 1))
+    rnd.shuffle(offline)
+    online = {}
+    running = {}
+    events = []
+
+    def connect():
+        free = [x for x in range(args.slots) if x not in online]
+        if free and offline:
+            slot = free[0]
+            online[slot] = offline.pop(0)
+            events.append(('connect', slot, online[slot]))
+
+    while len(online) < min(args.slots * 3 // 4, args.clients):
+        connect()
+
+    mapname = None
+    while len(events) < args.events:
+        if mapname is None or rnd.random() < 1.0 / args.mapevents:
+            mapname = rnd.choice(maps)
+            running.clear()
+            events.append(('map', None, mapname))
+            continue
+
+        slot = rnd.choice(list(online.keys()))
+        roll = rnd.random()
+        if slot in running and roll < 0.55:
+            way_id = running.pop(slot)
+            base = 30000 + (hash((mapname, way_id)) % 270000)
+            events.append(('stop', slot, {'way_id': str(way_id),
+                                          'way_time': str(int(base * skill[online[slot]] * rnd.uniform(0.85, 1.4)))}))
+        elif slot in running and roll < 0.65:
+            running.pop(slot)
+            events.append(('cancel', slot, None))
+        elif roll < 0.85:
+            running[slot] = rnd.randint(1, args.ways)
+            events.append(('start', slot, {'way_id': str(running[slot])}))
+        elif roll < 0.88:
+            running.pop(slot, None)
+            events.append(('team', slot, rnd.choice([b3.TEAM_SPEC, b3.TEAM_FREE])))
+        elif roll < 0.90:
+            running.pop(slot, None)
+            events.append(('disconnect', slot, None))
+            offline.append(online.pop(slot))
+            connect()
+        elif roll < 0.91:
+            running.clear()
+            events.append(('round', None, None))
+        elif roll < 0.94:
+            events.append(('!record', slot, ''))
+        elif roll < 0.96:
+            events.append(('!maprecord', slot, ''))
+        elif roll < 0.985:
+            events.append(('!top', slot, '%d %d' % (rnd.randint(1, args.ways), rnd.randint(1, 3))))
+        else:
+            events.append(('!mapinfo', slot, rnd.choice(maps)[4:rnd.randint(8, 16)]))
+    return events
+
+
+class Harness(object):
+    """
+    Build the plugin on top of the fakes and replay the events measuring them
+    """
+    EVENTS = {
+        'start': b3.events.EVT_CLIENT_JUMP_RUN_START,
+        'stop': b3.events.EVT_CLIENT_JUMP_RUN_STOP,
+        'cancel': b3.events.EVT_CLIENT_JUMP_RUN_CANCEL,
+        'team': b3.events.EVT_CLIENT_TEAM_CHANGE,
+        'disconnect': b3.events.EVT_CLIENT_DISCONNECT,
+        'round': b3.events.EVT_GAME_ROUND_START,
+    }
+
+    COMMANDS = {
+        '!record': 'cmd_jmprecord',
+        '!maprecord': 'cmd_jmpmaprecord',
+        '!top': 'cmd_jmptop',
+        '!mapinfo': 'cmd_jmpmapinfo',
+    }
+
+    def __init__(self, args):
+        self.args = args
+        self.workdir = tempfile.mkdtemp(prefix='jumper-harness-')
+        os.makedirs(os.path.join(self.workdir, 'q3ut4', 'serverdemos'))
+        storage = Storage()
+        self.console = Console(storage, self.workdir, args.demosize, args.verbose)
+        self.console.plugins['admin'] = Admin(self.console)
+        self.players = {}
+        for client_id in range(1, args.clients + 1):
+            self.players[client_id] = Client(self.console, client_id, 'player%d' % client_id)
+            storage.db.execute("INSERT INTO `clients` VALUES (?, ?, ?)", (client_id, self.players[client_id].name,
+                                                                        self.players[client_id].guid))
+
+        # A fresh map catalogue cache keeps the catalogue thread from going online
+        cachefile = os.path.join(self.workdir, 'jumper_maps.json')
+        maps = dict([('ut4_harness_%03d' % i, {'name': 'Harness %d' % i, 'bsp': 'ut4_harness_%03d' % i,
+                                               'author': 'harness', 'level': i % 100, 'date': '2013-09-01'})
+                     for i in range(args.maps)])
+        with open(cachefile, 'w') as f:
+            json.dump({'etag': None, 'modified': None, 'updated': time.time() + 86400, 'maps': maps}, f)
+
+        settings = {'demorecord': 'yes' if args.demos else 'no',
+                    'demoarchive': os.path.join(self.workdir, 'archive') if args.archive else '',
+                    'mapinfourl': 'http://127.0.0.1:9/',
+                    'mapinfocache': cachefile,
+                    'mapinforefresh': 86400,
+                    'outputrate': args.outputrate,
+                    'outputclientrate': args.outputrate,
+                    'stats': 'yes' if args.stats else 'no',
+                    'workers': args.workers,
+                    'database': os.path.join(self.workdir, 'jumper.db') if args.sqlite else ''}
+
+        self.plugin = JumperPlugin(self.console)
+        # The plugin connection on the B3 database is the in-memory storage
+        self.plugin.getConnection = lambda: storage
+        self.fired = []
+        self.handled = []
+        self.recordOrder()
+        self.plugin.config = Config(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'extplugins', 'conf', 'jumper.xml'),
+                                    {'settings': settings})
+        self.plugin.onLoadConfig()
+        if self.plugin.onStartup() is False:
+            raise SystemExit('could not start the jumper plugin')
+
+        if args.sqlite:
+            # Account the statements executed on the plugin SQLite database too
+            backend = self.plugin._storage
+            run, write = backend.run, backend.write
+
+            def counted_run(sql, params=()):
+                storage.queries += 1
+                return run(sql, params)
+
+            def counted_write(statements):
+                storage.queries += len(statements) + 2
+                return write(statements)
+
+            backend.run, backend.write = counted_run, counted_write
+
+    def close(self):
+        shutil.rmtree(self.workdir, ignore_errors=True)
+
+    def recordOrder(self):
+        """
+        Log the beginning and the end of every event handled by the plugin
+        """
+        handle = self.plugin.handleEvent
+        lock = threading.Lock()
+
+        def recorded(event):
+            with lock:
+                self.handled.append(('begin', event.seq))
+            try:
+                handle(event)
+            finally:
+                with lock:
+                    self.handled.append(('end', event.seq))
+
+        self.plugin.handleEvent = recorded
+
+    def fire(self, event):
+        """
+        Number the event (the slot is taken now: the client may have moved when it is handled) and pass it to the plugin
+        """
+        event.seq = len(self.fired) + 1
+        self.fired.append((event.seq, event.client.cid if event.client is not None else None))
+        self.plugin.onEvent(event)
+
+    def checkOrder(self):
+        """
+        Count the events handled out of order: after an event of the same slot fired later, while a
+        round start or map change was handled, or before such a barrier fired earlier
+        """
+        begin, end = {}, {}
+        for pos, (what, seq) in enumerate(self.handled):
+            (begin if what == 'begin' else end)[seq] = pos
+
+        violations = len([x for x, _ in self.fired if x not in end])
+        last = {}
+        barriers = []
+        for seq, cid in self.fired:
+            if seq not in end:
+                continue
+            if cid is None:
+                barriers.append(seq)
+            elif cid in last and end[last[cid]] > begin[seq]:
+                violations += 1
+            if cid is not None:
+                last[cid] = seq
+
+        # Latest end of the events fired up to seq and earliest beginning of the events fired from seq
+        ended, begun = [-1], [len(self.handled)] * (len(self.fired) + 2)
+        for seq, _ in self.fired:
+            ended.append(max(ended[-1], end.get(seq, -1)))
+        for seq, _ in reversed(self.fired):
+            begun[seq] = min(begun[seq + 1], begin.get(seq, len(self.handled)))
+        for seq in barriers:
+            if ended[seq - 1] > begin[seq] or begun[seq + 1] < end[seq]:
+                violations += 1
+
+        return {'events': len(self.fired), 'barriers': len(barriers), 'violations': violations}
+
+    def dispatch(self, kind, slot, data):
+        """
+        Turn a generated event into the matching plugin call
+        """
+        slots = self.console.clients.slots
+        if kind == 'map':
+            self.console.game.mapName = data
+            self.fire(b3.events.Event(b3.events.EVT_GAME_MAP_CHANGE, {'new': data}))
+            self.fire(b3.events.Event(b3.events.EVT_GAME_ROUND_START, None))
+        elif kind == 'connect':
+            # B3 builds a new client object on every connection
+            client = self.players[data]
+            client.cid = slot
+            client._vars = {}
+            client.connected = True
+            slots[slot] = client
+            self.fire(b3.events.Event(b3.events.EVT_CLIENT_AUTH, None, client))
+        elif kind in self.COMMANDS:
+            getattr(self.plugin, self.COMMANDS[kind])(data, slots[slot], Command())
+        elif kind == 'disconnect':
+            client = slots.pop(slot)
+            client.connected = False
+            self.fire(b3.events.Event(b3.events.EVT_CLIENT_DISCONNECT, None, client))
+        else:
+            self.fire(b3.events.Event(self.EVENTS[kind], data, slots.get(slot)))
+
+    def replay(self, events):
+        """
+        Replay the events and return the per kind measures and the totals
+        """
+        measures = {}
+        storage = self.console.storage
+        busy = 0.0
+        start = time.time()
+        for kind, slot, data in events:
+            self.console.clock += 1.5
+            queries = storage.queries
+            rcon = self.console.counters['write']
+            t = time.time()
+            self.dispatch(kind, slot, data)
+            elapsed = time.time() - t
+            busy += elapsed
+            m = measures.setdefault(kind, {'latency': [], 'queries': 0, 'rcon': 0})
+            m['latency'].append(elapsed * 1000000)
+            m['queries'] += storage.queries - queries
+            m['rcon'] += self.console.counters['write'] - rcon
+        replay = time.time() - start
+
+        # Wait for the background threads to drain so their work is accounted:
+        # on shutdown the writer and the demo manager complete their queued jobs
+        if self.plugin._dispatcher is not None:
+            self.plugin._dispatcher.sync()
+        deadline = time.time() + 60
+        while self.plugin._output.stats()['depth'] and time.time() < deadline:
+            time.sleep(0.01)
+        self.plugin.stopServices()
+        drain = time.time() - start - replay
+
+        totals = {'events': len(events),
+                  'replay': replay,
+                  'drain': drain,
+                  'busy': busy,
+                  'throughput': len(events) / busy if busy else 0,
+                  'queries': storage.queries,
+                  'rcon': self.console.rcon(),
+                  'counters': dict(self.console.counters),
+                  'writer': self.plugin._writer.stats(),
+                  'output': self.plugin._output.stats(),
+                  'demos': self.plugin._demoManager.stats(),
+                  'ordering': self.checkOrder()}
+        if self.plugin._dispatcher is not None:
+            totals['workers'] = self.plugin._dispatcher.stats()
+        if getattr(self.plugin, '_demoRecorder', None) is not None:
+            totals['recorder'] = self.plugin._demoRecorder.stats()
+        return measures, totals
+
+
+def percentile(timings, p):
+    return timings[min(len(timings) - 1, int(len(timings) * p))]
+
+
+def report(measures, totals):
+    """
+    Print the measures and return them as a JSON serializable dict
+    """
+    result = {'events': {}, 'totals': totals}
+    print('%-12s %7s %10s %10s %10s %10s %9s %9s' % ('event', 'count', 'p50', 'p95', 'p99', 'max', 'sql/ev', 'rcon/ev'))
+    for kind in sorted(measures):
+        m = measures[kind]
+        timings = sorted(m['latency'])
+        count = len(timings)
+        row = {'count': count, 'p50': percentile(timings, 0.5), 'p95': percentile(timings, 0.95),
+               'p99': percentile(timings, 0.99), 'max': timings[-1],
+               'queries': float(m['queries']) / count, 'rcon': float(m['rcon']) / count}
+        result['events'][kind] = row
+        print('%-12s %7d %8.1fus %8.1fus %8.1fus %8.1fus %9.2f %9.2f' % (kind, count, row['p50'], row['p95'], row['p99'],
+                                                                        row['max'], row['queries'], row['rcon']))
+
+    events = totals['events']
+    print('')
+    print('events      : %d replayed in %.2fs, %.2fs in the plugin (%.0f events/s), background drained in %.2fs' % (
+          events, totals['replay'], totals['busy'], totals['throughput'], totals['drain']))
+    print('queries     : %d (%.3f per event, including the background writer)' % (totals['queries'],
+                                                                                 float(totals['queries']) / events))
+    print('rcon writes : %d (%.3f per event: %d commands, %d say, %d messages)' % (totals['rcon'], float(totals['rcon']) / events,
+                                                                                totals['counters']['write'],
+                                                                                totals['counters']['say'],
+                                                                                totals['counters']['message']))
+    print('writer      : %(written)d rows in %(flushes)d flushes, %(errors)d errors, %(dropped)d dropped' % totals['writer'])
+    print('output      : %(lines)d lines, %(writes)d writes, %(saved)d saved by packing, %(duplicates)d duplicates, %(dropped)d dropped' % totals['output'])
+    print('demos       : %(deleted)d deleted, %(failed)d failed, %(archived)d archived' % totals['demos'])
+    if 'recorder' in totals:
+        print('recorder    : %(started)d started, %(cycles)d restart cycles avoided, %(skipped)d over the cap, '
+              '%(avoided)d files (%(avoidedbytes)d bytes) avoided' % totals['recorder'])
+    if 'workers' in totals:
+        print('workers     : %(workers)d threads, %(dispatched)d events dispatched, %(barriers)d barriers, '
+              '%(full)d times full' % totals['workers'])
+    print('ordering    : %(events)d events, %(barriers)d barriers, %(violations)d handled out of order' % totals['ordering'])
+    print('log         : %(warning)d warnings, %(error)d errors' % totals['counters'])
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description='jumper plugin event replay benchmark')
+    parser.add_argument('--clients', type=int, default=300, help='number of distinct players')
+    parser.add_argument('--slots', type=int, default=64, help='server slots')
+    parser.add_argument('--maps', type=int, default=40)
+    parser.add_argument('--ways', type=int, default=3)
+    parser.add_argument('--events', type=int, default=20000)
+    parser.add_argument('--mapevents', type=int, default=1500, help='average number of events per map')
+    parser.add_argument('--demos', type=int, default=1, help='enable the demo auto recording (0/1)')
+    parser.add_argument('--archive', type=int, default=0, help='enable the demo archive (0/1)')
+    parser.add_argument('--demosize', type=int, default=4096, help='size of the fake demo files')
+    parser.add_argument('--outputrate', type=float, default=100000.0, help='output scheduler rate (messages/s)')
+    parser.add_argument('--sqlite', type=int, default=0, help='store the plugin tables in a SQLite database (0/1)')
+    parser.add_argument('--stats', type=int, default=0, help='enable the plugin statistics (0/1)')
+    parser.add_argument('--workers', type=int, default=0, help='number of event workers (0 handles the events in the replay thread)')
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--json', help='also write the results in the given file')
+    parser.add_argument('--verbose', '-v', action='count', default=0)
+    args = parser.parse_args()
+
+    events = generate(args)
+    harness = Harness(args)
+    try:
+        measures, totals = harness.replay(events)
+    finally:
+        harness.close()
+
+    result = report(measures, totals)
+    if args.json:
+        result['args'] = vars(args)
+        with open(args.json, 'w') as f:
+            json.dump(result, f, indent=2, sort_keys=True)
+
+    if totals['ordering']['violations']:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
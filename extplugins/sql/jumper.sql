@@ -7,5 +7,84 @@ CREATE TABLE IF NOT EXISTS `jumpruns` (
   `time_add` int(10) unsigned NOT NULL,
   `time_edit` int(10) unsigned NOT NULL,
   `demo` varchar(128) DEFAULT NULL,
+  PRIMARY KEY (`id`),
+  UNIQUE KEY `client_map_way` (`client_id`, `mapname`, `way_id`),
+  KEY `map_way_time` (`mapname`, `way_id`, `way_time`)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8 AUTO_INCREMENT=1 ;
+
+CREATE TABLE IF NOT EXISTS `jumprecords` (
+  `mapname` varchar(64) NOT NULL,
+  `way_id` int(3) NOT NULL,
+  `client_id` int(10) unsigned NOT NULL,
+  `way_time` int(10) unsigned NOT NULL,
+  `time_edit` int(10) unsigned NOT NULL,
+  `demo` varchar(128) DEFAULT NULL,
+  PRIMARY KEY (`mapname`, `way_id`),
+  KEY `time_edit` (`time_edit`)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8 ;
+
+CREATE TABLE IF NOT EXISTS `jumpfleet` (
+  `peer` varchar(32) NOT NULL,
+  `mapname` varchar(64) NOT NULL,
+  `way_id` int(3) NOT NULL,
+  `client_id` int(10) unsigned NOT NULL,
+  `name` varchar(32) DEFAULT NULL,
+  `way_time` int(10) unsigned NOT NULL,
+  `time_edit` int(10) unsigned NOT NULL,
+  PRIMARY KEY (`mapname`, `way_id`, `peer`)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8 ;
+
+CREATE TABLE IF NOT EXISTS `jumpsync` (
+  `peer` varchar(32) NOT NULL,
+  `change_id` int(10) unsigned NOT NULL,
+  `time_sync` int(10) unsigned NOT NULL,
+  PRIMARY KEY (`peer`)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8 ;
+
+CREATE TABLE IF NOT EXISTS `jumpchanges` (
+  `id` int(10) unsigned NOT NULL AUTO_INCREMENT,
+  `mapname` varchar(64) NOT NULL,
+  `time_add` int(10) unsigned NOT NULL,
   PRIMARY KEY (`id`)
-) ENGINE=MyISAM DEFAULT CHARSET=utf8 AUTO_INCREMENT=1 ;
\ No newline at end of file
+) ENGINE=InnoDB DEFAULT CHARSET=utf8 AUTO_INCREMENT=1 ;
+
+CREATE TABLE IF NOT EXISTS `jumpschema` (
+  `version` int(10) unsigned NOT NULL,
+  `time_add` int(10) unsigned NOT NULL,
+  PRIMARY KEY (`version`)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8 ;
+
+CREATE TABLE IF NOT EXISTS `jumphistory` (
+  `id` int(10) unsigned NOT NULL AUTO_INCREMENT,
+  `client_id` int(10) unsigned NOT NULL,
+  `mapname` varchar(64) NOT NULL,
+  `way_id` int(3) NOT NULL,
+  `way_time` int(10) unsigned NOT NULL,
+  `time_add` int(10) unsigned NOT NULL,
+  PRIMARY KEY (`id`),
+  KEY `time_add` (`time_add`)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8 AUTO_INCREMENT=1 ;
+
+CREATE TABLE IF NOT EXISTS `jumpsummary` (
+  `client_id` int(10) unsigned NOT NULL,
+  `mapname` varchar(64) NOT NULL,
+  `way_id` int(3) NOT NULL,
+  `attempts` int(10) unsigned NOT NULL,
+  `finishes` int(10) unsigned NOT NULL,
+  `best` int(10) unsigned DEFAULT NULL,
+  `median` int(10) unsigned DEFAULT NULL,
+  `step` int(10) NOT NULL,
+  `time_edit` int(10) unsigned NOT NULL,
+  PRIMARY KEY (`mapname`, `way_id`, `client_id`)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8 ;
+
+CREATE TABLE IF NOT EXISTS `jumpprofiles` (
+  `client_id` int(10) unsigned NOT NULL,
+  `records` int(10) NOT NULL,
+  `maprecords` int(10) NOT NULL,
+  `maps` int(10) NOT NULL,
+  `time_edit` int(10) unsigned NOT NULL,
+  PRIMARY KEY (`client_id`)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8 ;
+
+INSERT IGNORE INTO `jumpschema` (`version`, `time_add`) VALUES (6, UNIX_TIMESTAMP());
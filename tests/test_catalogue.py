@@ -0,0 +1,183 @@
+#
+# Jumper Plugin for BigBrotherBot(B3) (www.bigbrotherbot.net)
+# Copyright (C) 2013 Fenix <fenix@urbanterror.info)
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the Free Software
+# Foundation, Inc., 51 Franklin St, Fifth Floor, Boston, MA  02110-1301  USA
+
+"""
+JumpMapCatalogue against a local HTTP server standing for the UrTJumpers API
+"""
+
+import BaseHTTPServer
+import json
+import os
+import shutil
+import sys
+import tempfile
+import threading
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'extplugins'))
+
+import jumper
+
+MAPS = [{ 'nom' : 'Uranus', 'pk3' : 'ut4_uranus', 'mapper' : 'Fenix', 'level' : '40', 'mdate' : '2013-05-01' },
+        { 'nom' : 'Neptune', 'pk3' : 'ut4_neptune', 'mapper' : '', 'level' : '0', 'mdate' : '2012-11-20' }]
+
+
+class Handler(BaseHTTPServer.BaseHTTPRequestHandler):
+    """
+    Serve the map list with an ETag, answering 304 to a matching If-None-Match
+    """
+    def do_GET(self):
+        server = self.server
+        server.requests.append(dict(self.headers))
+        if server.status != 200:
+            self.send_error(server.status)
+            return
+        if self.headers.get('If-None-Match') == server.etag:
+            self.send_response(304)
+            self.end_headers()
+            return
+        body = json.dumps(server.maps)
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.send_header('ETag', server.etag)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+class Stats(object):
+
+    def __init__(self):
+        self.counters = {}
+
+    def count(self, name, value=1):
+        self.counters[name] = self.counters.get(name, 0) + value
+
+
+class Plugin(object):
+    """
+    The plugin methods used by the catalogue
+    """
+    def __init__(self):
+        self._stats = Stats()
+        self.catalogues = []
+        self.updated = threading.Event()
+        self.warnings = []
+
+    def onMapCatalogue(self, maps):
+        self.catalogues.append(maps)
+        self.updated.set()
+
+    def debug(self, msg, *args):
+        pass
+
+    def warning(self, msg, *args):
+        self.warnings.append(msg)
+
+
+class MapCatalogueTest(unittest.TestCase):
+
+    def setUp(self):
+        self.server = BaseHTTPServer.HTTPServer(('127.0.0.1', 0), Handler)
+        self.server.requests = []
+        self.server.maps = MAPS
+        self.server.etag = '"v1"'
+        self.server.status = 200
+        self.thread = threading.Thread(target=self.server.serve_forever)
+        self.thread.daemon = True
+        self.thread.start()
+        self.tmpdir = tempfile.mkdtemp()
+        self.cachefile = os.path.join(self.tmpdir, 'jumper_maps.json')
+        self.url = 'http://127.0.0.1:%d/?liste=maps&format=json' % self.server.server_address[1]
+        self.plugin = Plugin()
+
+    def tearDown(self):
+        self.server.shutdown()
+        self.server.server_close()
+        shutil.rmtree(self.tmpdir)
+
+    def catalogue(self, ttl=3600):
+        return jumper.JumpMapCatalogue(self.plugin, self.url, self.cachefile, ttl)
+
+    def test_fetch(self):
+        catalogue = self.catalogue()
+        self.assertTrue(catalogue.fetch())
+        self.assertEqual(sorted(catalogue.maps.keys()), ['ut4_neptune', 'ut4_uranus'])
+        self.assertEqual(catalogue.maps['ut4_uranus'], { 'name' : 'Uranus', 'bsp' : 'ut4_uranus', 'author' : 'Fenix',
+                                                         'level' : '40', 'date' : '2013-05-01' })
+        self.assertEqual(catalogue.etag, '"v1"')
+        self.assertNotIn('if-none-match', self.server.requests[0])
+        self.assertEqual(self.plugin._stats.counters, { 'api.fetch' : 1 })
+
+    def test_not_modified(self):
+        catalogue = self.catalogue()
+        catalogue.fetch()
+        maps = catalogue.maps
+        catalogue.updated = 0
+        self.assertFalse(catalogue.fetch())
+        self.assertEqual(self.server.requests[1].get('if-none-match'), '"v1"')
+        self.assertTrue(catalogue.maps is maps)
+        self.assertTrue(catalogue.updated > 0)
+        self.assertEqual(self.plugin._stats.counters['api.notmodified'], 1)
+
+    def test_changed(self):
+        catalogue = self.catalogue()
+        catalogue.fetch()
+        self.server.maps = MAPS[:1]
+        self.server.etag = '"v2"'
+        self.assertTrue(catalogue.fetch())
+        self.assertEqual(catalogue.maps.keys(), ['ut4_uranus'])
+        self.assertEqual(catalogue.etag, '"v2"')
+
+    def test_error_keeps_catalogue(self):
+        catalogue = self.catalogue()
+        catalogue.fetch()
+        maps = catalogue.maps
+        self.server.status = 500
+        self.assertFalse(catalogue.fetch())
+        self.assertTrue(catalogue.maps is maps)
+        self.assertEqual(self.plugin._stats.counters['api.error'], 1)
+        self.assertEqual(len(self.plugin.warnings), 1)
+
+    def test_cache_file(self):
+        self.catalogue().fetch()
+        catalogue = self.catalogue()
+        catalogue.load()
+        self.assertEqual(sorted(catalogue.maps.keys()), ['ut4_neptune', 'ut4_uranus'])
+        self.assertEqual(catalogue.etag, '"v1"')
+        # The cached copy is revalidated with the stored ETag
+        catalogue.updated = 0
+        self.assertFalse(catalogue.fetch())
+        self.assertEqual(self.server.requests[-1].get('if-none-match'), '"v1"')
+
+    def test_background_refresh(self):
+        catalogue = self.catalogue()
+        catalogue.start()
+        try:
+            self.assertTrue(self.plugin.updated.wait(10))
+        finally:
+            catalogue.stop()
+        self.assertEqual(sorted(self.plugin.catalogues[0].keys()), ['ut4_neptune', 'ut4_uranus'])
+        self.assertTrue(os.path.isfile(self.cachefile))
+
+
+if __name__ == '__main__':
+    unittest.main()
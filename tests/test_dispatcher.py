@@ -0,0 +1,198 @@
+#
+# Jumper Plugin for BigBrotherBot(B3) (www.bigbrotherbot.net)
+# Copyright (C) 2013 Fenix <fenix@urbanterror.info)
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the Free Software
+# Foundation, Inc., 51 Franklin St, Fifth Floor, Boston, MA  02110-1301  USA
+
+"""
+JumpDispatcher driven by a stub plugin recording the order in which the
+events are handled and the handlers running at the same time, and the
+handlers reached by every event type through the plugin
+"""
+
+import os
+import random
+import sys
+import threading
+import time
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'extplugins'))
+
+import b3.events
+
+from jumper import JumperPlugin, JumpDispatcher, JumpRunRegistry
+
+
+class Client(object):
+
+    def __init__(self, cid):
+        self.cid = cid
+
+
+class Plugin(object):
+    """
+    The plugin methods used by the dispatcher
+    """
+    _eventNames = { 'run' : 'run', 'round' : 'round', 'fail' : 'fail' }
+
+    def __init__(self, delay=0.0):
+        self.delay = delay
+        self.lock = threading.Lock()
+        self.handled = []
+        self.threads = {}
+        self.running = 0
+        self.overlaps = []
+        self.errors = []
+        self.warnings = []
+        self.random = random.Random(7)
+
+    def processEvent(self, event):
+        with self.lock:
+            self.running += 1
+            if event.client is None and self.running > 1:
+                self.overlaps.append(event.data)
+            if event.client is not None:
+                self.threads.setdefault(event.client.cid, set()).add(threading.currentThread().getName())
+            delay = self.random.random() * self.delay
+        try:
+            if event.type == 'fail':
+                raise ValueError('handler failure')
+            time.sleep(delay)
+            with self.lock:
+                if self.running > 1 and event.client is None:
+                    self.overlaps.append(event.data)
+                self.handled.append(event)
+        finally:
+            with self.lock:
+                self.running -= 1
+
+    def warning(self, msg, *args):
+        self.warnings.append(msg)
+
+    def error(self, msg, *args):
+        self.errors.append(msg)
+
+
+class DispatcherTest(unittest.TestCase):
+
+    def setUp(self):
+        self.plugin = Plugin(delay=0.002)
+        self.dispatcher = JumpDispatcher(self.plugin, workers=4, maxsize=500)
+        self.dispatcher.start()
+        self.clients = [Client(x) for x in range(8)]
+
+    def tearDown(self):
+        self.dispatcher.stop()
+
+    def fire(self, count, barriers=()):
+        """
+        Dispatch runs of random clients (and a barrier at the given positions)
+        and return the dispatched events
+        """
+        rand = random.Random(count)
+        events = []
+        for num in range(count):
+            if num in barriers:
+                event = b3.events.Event('round', num)
+            else:
+                event = b3.events.Event('run', num, rand.choice(self.clients))
+            self.dispatcher.dispatch(event)
+            events.append(event)
+        self.dispatcher.sync()
+        return events
+
+    def test_slot_order(self):
+        events = self.fire(400)
+        self.assertEqual(len(self.plugin.handled), 400)
+        for client in self.clients:
+            sent = [x.data for x in events if x.client is client]
+            handled = [x.data for x in self.plugin.handled if x.client is client]
+            self.assertEqual(handled, sent)
+            # The events of a slot are always handled by the same worker
+            self.assertEqual(len(self.plugin.threads[client.cid]), 1)
+
+    def test_barrier_exclusive(self):
+        barriers = (50, 51, 120, 200, 399)
+        events = self.fire(400, barriers)
+        self.assertEqual(len(self.plugin.handled), 400)
+        self.assertEqual(self.plugin.overlaps, [])
+        handled = [x.data for x in self.plugin.handled]
+        for num in barriers:
+            # Every event dispatched before a barrier is handled before it, every later one after it
+            position = handled.index(num)
+            self.assertEqual(sorted(handled[:position]), range(num))
+        self.assertEqual(self.dispatcher.stats()['barriers'], len(barriers))
+        self.assertEqual(self.dispatcher.stats()['dispatched'], len(events))
+
+    def test_handler_error(self):
+        client = self.clients[0]
+        self.dispatcher.dispatch(b3.events.Event('run', 0, client))
+        self.dispatcher.dispatch(b3.events.Event('fail', 1, client))
+        self.dispatcher.dispatch(b3.events.Event('run', 2, client))
+        self.dispatcher.sync()
+        # The worker goes on with the next events of the slot
+        self.assertEqual([x.data for x in self.plugin.handled], [0, 2])
+        self.assertEqual(len(self.plugin.errors), 1)
+        self.assertTrue(self.dispatcher.isRunning())
+
+    def test_stop_handles_queued(self):
+        for num in range(100):
+            self.dispatcher.dispatch(b3.events.Event('run', num, self.clients[num % len(self.clients)]))
+        self.dispatcher.stop()
+        self.assertFalse(self.dispatcher.isRunning())
+        self.assertEqual(len(self.plugin.handled), 100)
+
+
+class HandleEventTest(unittest.TestCase):
+    """
+    The plugin is built without B3 (no console) and its handlers replaced by recorders
+    """
+    handlers = ('onJumpRunStart', 'onJumpRunCancel', 'onJumpRunStop', 'onDisconnect', 'onTeamChange', 'onRoundStart',
+                'onMapChange', 'onClientAuth', 'onClientName', 'onRunExpire', 'onDisable')
+
+    def setUp(self):
+        self.plugin = JumperPlugin.__new__(JumperPlugin)
+        self.called = []
+        for name in self.handlers:
+            setattr(self.plugin, name, self.recorder(name))
+
+    def recorder(self, name):
+        def handler(*args):
+            self.called.append(name)
+        return handler
+
+    def handle(self, type):
+        del self.called[:]
+        self.plugin.handleEvent(b3.events.Event(type, {}, Client(0)))
+        return self.called
+
+    def test_handlers(self):
+        self.assertEqual(self.handle(b3.events.EVT_CLIENT_JUMP_RUN_START), ['onJumpRunStart'])
+        self.assertEqual(self.handle(b3.events.EVT_CLIENT_JUMP_RUN_CANCEL), ['onJumpRunCancel'])
+        self.assertEqual(self.handle(b3.events.EVT_CLIENT_JUMP_RUN_STOP), ['onJumpRunStop'])
+        self.assertEqual(self.handle(b3.events.EVT_CLIENT_DISCONNECT), ['onDisconnect'])
+        self.assertEqual(self.handle(b3.events.EVT_CLIENT_TEAM_CHANGE), ['onTeamChange'])
+        self.assertEqual(self.handle(b3.events.EVT_GAME_ROUND_START), ['onRoundStart'])
+        self.assertEqual(self.handle(b3.events.EVT_GAME_MAP_CHANGE), ['onMapChange'])
+        # The name of a joining client is refreshed and his profile loaded
+        self.assertEqual(self.handle(b3.events.EVT_CLIENT_AUTH), ['onClientName', 'onClientAuth'])
+        self.assertEqual(self.handle(b3.events.EVT_CLIENT_NAME_CHANGE), ['onClientName'])
+        self.assertEqual(self.handle(JumpRunRegistry.EVT_RUN_EXPIRE), ['onRunExpire'])
+        self.assertEqual(self.handle(b3.events.EVT_STOP), ['onDisable'])
+
+
+if __name__ == '__main__':
+    unittest.main()
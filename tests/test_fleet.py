@@ -0,0 +1,197 @@
+#
+# Jumper Plugin for BigBrotherBot(B3) (www.bigbrotherbot.net)
+# Copyright (C) 2013 Fenix <fenix@urbanterror.info)
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the Free Software
+# Foundation, Inc., 51 Franklin St, Fifth Floor, Boston, MA  02110-1301  USA
+
+"""
+JumpFleetSync between two local SQLite databases: the peer records are
+written with the statements used by the plugin and pulled into the local
+jumpfleet table
+"""
+
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'extplugins'))
+
+from jumper import JumperPlugin, JumpFleetSync, JumpSQLiteStorage
+
+
+class Stats(object):
+
+    def count(self, name, value=1):
+        pass
+
+
+class Plugin(object):
+    """
+    The plugin methods used by the fleet synchronization
+    """
+    _sql = JumperPlugin._sql
+    _sqlite = JumperPlugin._sqlite
+
+    def __init__(self, storage):
+        self._storage = storage
+        self._stats = Stats()
+        self.changed = []
+        self.warnings = []
+
+    def query(self, key, params=()):
+        return self._storage.query(key, params)
+
+    def onFleetRecords(self, peer, maps):
+        self.changed.append((peer, maps))
+
+    def debug(self, msg, *args):
+        pass
+
+    def warning(self, msg, *args):
+        self.warnings.append(msg)
+
+
+class FleetSyncTest(unittest.TestCase):
+
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        self.local = self.storage('local.db')
+        self.peer = self.storage('peer.db')
+        self.plugin = Plugin(self.local)
+        self.connections = {}
+
+    def tearDown(self):
+        for conn, dialect in self.connections.values():
+            conn.close()
+        self.local.close()
+        self.peer.close()
+        shutil.rmtree(self.tmpdir)
+
+    def storage(self, name):
+        storage = JumpSQLiteStorage(os.path.join(self.tmpdir, name), JumperPlugin._sqlite, JumperPlugin._sqliteSchema)
+        for num in range(storage.getVersion(), len(storage.schema)):
+            storage.migrate(num, 0)
+        return storage
+
+    def fleet(self, batchsize=1000):
+        fleet = JumpFleetSync(self.plugin, [('peer', os.path.join(self.tmpdir, 'peer.db'))], batchsize=batchsize)
+        fleet.load()
+        return fleet
+
+    def finish(self, client_id, mapname, way_id, way_time, now):
+        """
+        Store a run on the peer the way the plugin does when it's a new map record
+        """
+        self.peer.write([('q5', [(client_id, mapname, way_id, way_time, now, now, None)]),
+                         ('q11', [(mapname, way_id, client_id, way_time, now, None)]),
+                         ('q41', [(mapname, now)])])
+
+    def delrecord(self, client_id, mapname, now):
+        """
+        Remove the runs of a client on the peer the way !delrecord does
+        """
+        self.peer.transaction([('q7', (client_id, mapname)),
+                               ('q14', (mapname,)),
+                               ('q18', (mapname,)),
+                               ('q42', (mapname, now))])
+
+    def records(self):
+        cursor = self.local.execute("SELECT peer, mapname, way_id, client_id, way_time FROM jumpfleet ORDER BY mapname, way_id")
+        rows = []
+        while not cursor.EOF:
+            r = cursor.getRow()
+            rows.append((r['peer'], r['mapname'], r['way_id'], r['client_id'], r['way_time']))
+            cursor.moveNext()
+        return rows
+
+    def test_pull(self):
+        self.finish(1, 'ut4_a', 1, 5000, 100)
+        self.finish(2, 'ut4_b', 1, 7000, 100)
+        self.finish(2, 'ut4_b', 2, 9000, 100)
+        fleet = self.fleet()
+        fleet.sync(self.connections)
+        self.assertEqual(self.records(), [('peer', 'ut4_a', 1, 1, 5000),
+                                          ('peer', 'ut4_b', 1, 2, 7000),
+                                          ('peer', 'ut4_b', 2, 2, 9000)])
+        self.assertEqual(fleet.pulled, 3)
+        self.assertEqual(self.plugin.changed, [('peer', ['ut4_a', 'ut4_b'])])
+        self.assertEqual(fleet.watermarks, { 'peer' : 3 })
+        self.assertEqual(self.local.query('q19').getRow()['change_id'], 3)
+
+    def test_late_commit(self):
+        self.finish(1, 'ut4_a', 1, 5000, 200)
+        fleet = self.fleet()
+        fleet.sync(self.connections)
+        # Committed after the synchronization with an older time_edit than the pulled records
+        self.finish(2, 'ut4_b', 1, 6000, 150)
+        fleet.sync(self.connections)
+        self.assertEqual(self.records(), [('peer', 'ut4_a', 1, 1, 5000),
+                                          ('peer', 'ut4_b', 1, 2, 6000)])
+
+    def test_deletion(self):
+        self.finish(1, 'ut4_a', 1, 5000, 100)
+        self.finish(2, 'ut4_a', 1, 4000, 110)
+        self.finish(3, 'ut4_b', 1, 8000, 120)
+        fleet = self.fleet()
+        fleet.sync(self.connections)
+        self.assertEqual(self.records(), [('peer', 'ut4_a', 1, 2, 4000),
+                                          ('peer', 'ut4_b', 1, 3, 8000)])
+        # The record goes back to the previous holder, the only record of the other map is removed
+        self.delrecord(2, 'ut4_a', 130)
+        self.delrecord(3, 'ut4_b', 130)
+        fleet.sync(self.connections)
+        self.assertEqual(self.records(), [('peer', 'ut4_a', 1, 1, 5000)])
+
+    def test_rebuild(self):
+        self.finish(1, 'ut4_a', 1, 5000, 100)
+        fleet = self.fleet()
+        fleet.sync(self.connections)
+        # Records rebuilt from the runs (!jmprebuild) are pulled again
+        self.peer.execute("UPDATE jumpruns SET way_time = 4500")
+        self.peer.query('q16')
+        self.peer.query('q15')
+        self.peer.query('q43', (200, 200))
+        fleet.sync(self.connections)
+        self.assertEqual(self.records(), [('peer', 'ut4_a', 1, 1, 4500)])
+
+    def test_batches_and_restart(self):
+        for i in range(5):
+            self.finish(1, 'ut4_%d' % i, 1, 1000 + i, 100)
+        fleet = self.fleet(batchsize=2)
+        fleet.sync(self.connections)
+        self.assertEqual(len(self.records()), 5)
+        self.assertEqual(len(self.plugin.changed), 3)
+
+        # A restarted synchronization resumes from the stored watermark
+        self.finish(2, 'ut4_0', 1, 900, 300)
+        fleet = self.fleet(batchsize=2)
+        self.assertEqual(fleet.watermarks, { 'peer' : 5 })
+        fleet.sync(self.connections)
+        self.assertEqual(fleet.pulled, 1)
+        self.assertEqual(self.records()[0], ('peer', 'ut4_0', 1, 2, 900))
+
+    def test_unreachable_peer(self):
+        os.remove(os.path.join(self.tmpdir, 'peer.db'))
+        fleet = self.fleet()
+        fleet.sync(self.connections)
+        self.assertEqual(fleet.errors, 1)
+        self.assertEqual(len(self.plugin.warnings), 1)
+        self.assertEqual(self.records(), [])
+
+
+if __name__ == '__main__':
+    unittest.main()
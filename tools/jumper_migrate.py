@@ -0,0 +1,116 @@
+#!/usr/bin/env python
+#
+# Jumper Plugin for BigBrotherBot(B3) (www.bigbrotherbot.net)
+# Copyright (C) 2013 Fenix <fenix@urbanterror.info)
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the Free Software
+# Foundation, Inc., 51 Franklin St, Fifth Floor, Boston, MA  02110-1301  USA
+
+"""
+Copy the jumpruns stored in the B3 MySQL database into the SQLite database
+used by the plugin when the 'database' setting is given.
+
+The rows are read in chunks ordered by id (no chunk is ever bigger than
+--chunk rows) and written with the plugin upsert, so the copy can be
+interrupted and started again and never replaces a better time already
+stored in the SQLite database. The map records and the player profiles are
+rebuilt at the end.
+Stop B3 (or at least the plugin) while migrating:
+
+    python jumper_migrate.py --user b3 --passwd secret --db b3 --database /path/to/b3/conf/jumper.db
+
+B3 must be importable (run from the B3 directory or set PYTHONPATH).
+"""
+
+from __future__ import print_function
+
+import argparse
+import os
+import sys
+import time
+
+import MySQLdb
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'extplugins'))
+
+from jumper import JumperPlugin, JumpSQLiteStorage
+
+SELECT = "SELECT `id`, `client_id`, `mapname`, `way_id`, `way_time`, `time_add`, `time_edit`, `demo` FROM `jumpruns` " \
+         "WHERE `id` > %s ORDER BY `id` ASC LIMIT %s"
+
+
+def chunks(conn, size):
+    """
+    Yield the jumpruns in lists of at most size rows
+    """
+    cursor = conn.cursor()
+    last = 0
+    while True:
+        cursor.execute(SELECT, (last, size))
+        rows = cursor.fetchall()
+        if not rows:
+            break
+        last = rows[-1][0]
+        yield [(int(r[1]), r[2], int(r[3]), int(r[4]), int(r[5]), int(r[6]), r[7] if r[7] not in ('', 'None') else None) for r in rows]
+    cursor.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description='copy the jumper plugin tables from MySQL to SQLite')
+    parser.add_argument('--host', default='localhost')
+    parser.add_argument('--port', type=int, default=3306)
+    parser.add_argument('--user', default='b3')
+    parser.add_argument('--passwd', default='')
+    parser.add_argument('--db', default='b3')
+    parser.add_argument('--database', required=True, help='SQLite database file (created when missing)')
+    parser.add_argument('--chunk', type=int, default=5000, help='number of rows read and written at once')
+    args = parser.parse_args()
+
+    conn = MySQLdb.connect(host=args.host, port=args.port, user=args.user, passwd=args.passwd, db=args.db, charset='utf8', use_unicode=False)
+    storage = JumpSQLiteStorage(args.database, JumperPlugin._sqlite, JumperPlugin._sqliteSchema)
+
+    version = storage.getVersion()
+    for num in range(version, len(storage.schema)):
+        print('upgrading %s schema to version %d' % (args.database, num + 1))
+        storage.migrate(num, int(time.time()))
+
+    cursor = conn.cursor()
+    cursor.execute("SELECT COUNT(*) FROM `jumpruns`")
+    total = cursor.fetchone()[0]
+    cursor.close()
+
+    copied = 0
+    start = time.time()
+    for rows in chunks(conn, args.chunk):
+        storage.write([('q5', rows)])
+        copied += len(rows)
+        elapsed = time.time() - start
+        sys.stdout.write('\rcopied %d/%d jumpruns (%.0f rows/s)' % (copied, total, copied / elapsed if elapsed else 0))
+        sys.stdout.flush()
+    print('')
+
+    print('rebuilding map records')
+    storage.execute(JumperPlugin._sqlite['q16'])
+    storage.execute(JumperPlugin._sqlite['q15'])
+    storage.query('q43', (int(time.time()), int(time.time())))
+    records = storage.query('q17').getRow()['num']
+    storage.transaction([('q30', ()), ('q29', ())])
+    print('copied %d jumpruns and rebuilt %d map records in %.1fs' % (copied, records, time.time() - start))
+
+    storage.close()
+    conn.close()
+
+
+if __name__ == '__main__':
+    main()
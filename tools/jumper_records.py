@@ -0,0 +1,350 @@
+#!/usr/bin/env python
+#
+# Jumper Plugin for BigBrotherBot(B3) (www.bigbrotherbot.net)
+# Copyright (C) 2013 Fenix <fenix@urbanterror.info)
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the Free Software
+# Foundation, Inc., 51 Franklin St, Fifth Floor, Boston, MA  02110-1301  USA
+
+"""
+Export the jumpruns of a server into a JSONL or CSV file and import them
+into another server (or back into the same one).
+
+Rows are streamed: the export reads them with a server side cursor and the
+import reads the file line by line and writes batches of multi-row upserts
+which keep the better time of a (client, map, way) already stored. The map
+records of the imported maps and the player profiles are rebuilt at the end.
+
+The database is the B3 MySQL database unless --database points to the SQLite
+file used by the plugin 'database' setting. Files ending with .gz are gzip
+compressed, the format is guessed from the file extension:
+
+    python jumper_records.py --user b3 --passwd secret export records.jsonl.gz
+    python jumper_records.py --user b3 --passwd secret export --since 1380000000 changes.csv
+    python jumper_records.py --database jumper.db import --guids --demo-path serverdemos/=archive/ records.jsonl.gz
+
+Client ids are only meaningful on the server which exported them: the export
+includes the client guid (MySQL only) so the import can resolve the local
+client with --guids, or ids can be translated using a --clients CSV file of
+'old id,new id' lines.
+
+B3 must be importable (run from the B3 directory or set PYTHONPATH).
+"""
+
+from __future__ import print_function
+
+import argparse
+import csv
+import gzip
+import json
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'extplugins'))
+
+from jumper import JumperPlugin, JumpMySQLConnection, JumpStorage, JumpSQLiteStorage
+
+FIELDS = ['client_id', 'guid', 'mapname', 'way_id', 'way_time', 'time_add', 'time_edit', 'demo']
+
+EXPORT = {
+    'mysql': "SELECT `j`.`client_id`, `c`.`guid`, `j`.`mapname`, `j`.`way_id`, `j`.`way_time`, `j`.`time_add`, `j`.`time_edit`, `j`.`demo` "
+             "FROM `jumpruns` `j` LEFT JOIN `clients` `c` ON `c`.`id` = `j`.`client_id` WHERE `j`.`time_edit` >= %s",
+    'sqlite': "SELECT client_id, NULL AS guid, mapname, way_id, way_time, time_add, time_edit, demo FROM jumpruns WHERE time_edit >= ?",
+}
+
+GUIDS = "SELECT `id`, `guid` FROM `clients` WHERE `guid` IN (%s)"
+
+
+def connect(args):
+    """
+    Return the (storage, DB-API connection, dialect) described by the arguments
+    """
+    if args.database:
+        storage = JumpSQLiteStorage(args.database, JumperPlugin._sqlite, JumperPlugin._sqliteSchema)
+        return storage, storage.db, 'sqlite'
+
+    conn = JumpMySQLConnection('mysql://%s:%s@%s:%d/%s' % (args.user, args.passwd, args.host, args.port, args.db))
+    return JumpStorage(conn, JumperPlugin._sql, JumperPlugin._schema), conn.conn, 'mysql'
+
+
+def upgrade(storage):
+    """
+    Make sure the plugin tables exist and are up to date
+    """
+    version = storage.getVersion()
+    for num in range(version, len(storage.schema)):
+        print('upgrading schema to version %d' % (num + 1), file=sys.stderr)
+        storage.migrate(num, int(time.time()))
+
+
+def openfile(path, mode):
+    """
+    Open the given file, gzip compressed when the name ends with .gz ('-' is stdin/stdout)
+    """
+    if path == '-':
+        return sys.stdin if mode == 'r' else sys.stdout
+    if path.endswith('.gz'):
+        return gzip.open(path, mode + 'b')
+    return open(path, mode + 'b')
+
+
+def guessformat(path, fmt):
+    """
+    Return the file format: the one given or the one matching the file extension
+    """
+    if fmt:
+        return fmt
+    name = path[:-3] if path.endswith('.gz') else path
+    return 'csv' if name.endswith('.csv') else 'jsonl'
+
+
+class Progress(object):
+    """
+    Report the number of processed rows (or lines) and the rate on stderr
+    """
+    def __init__(self, label, unit='rows'):
+        self.label = label
+        self.unit = unit
+        self.start = self.last = time.time()
+        self.rows = 0
+
+    def add(self, num):
+        self.rows += num
+        now = time.time()
+        if now - self.last >= 1:
+            self.last = now
+            self.show()
+
+    def show(self):
+        elapsed = time.time() - self.start
+        sys.stderr.write('\r%s %d %s (%.0f %s/s)' % (self.label, self.rows, self.unit, self.rows / elapsed if elapsed else 0, self.unit))
+        sys.stderr.flush()
+
+    def done(self):
+        self.show()
+        sys.stderr.write(' in %.1fs\n' % (time.time() - self.start))
+
+
+def stream(conn, dialect, since, size=1000):
+    """
+    Yield the jumpruns edited at or after the given time as dicts. MySQL rows are read
+    with an unbuffered (server side) cursor, SQLite ones with a lazily evaluated cursor
+    """
+    if dialect == 'mysql':
+        import MySQLdb.cursors
+        cursor = conn.cursor(MySQLdb.cursors.SSCursor)
+    else:
+        cursor = conn.cursor()
+
+    cursor.execute(EXPORT[dialect], (since,))
+    try:
+        while True:
+            rows = cursor.fetchmany(size)
+            if not rows:
+                break
+            for row in rows:
+                yield dict(zip(FIELDS, row))
+    finally:
+        cursor.close()
+
+
+def export(args):
+    """
+    Write the jumpruns into the output file
+    """
+    storage, conn, dialect = connect(args)
+    fmt = guessformat(args.file, args.format)
+    progress = Progress('exported')
+    watermark = args.since
+    out = openfile(args.file, 'w')
+    try:
+        writer = csv.DictWriter(out, FIELDS) if fmt == 'csv' else None
+        if writer:
+            writer.writeheader()
+        for row in stream(conn, dialect, args.since):
+            watermark = max(watermark, int(row['time_edit']))
+            if writer:
+                writer.writerow(dict([(k, '' if v is None else v) for k, v in row.iteritems()]))
+            else:
+                out.write(json.dumps(row) + '\n')
+            progress.add(1)
+    finally:
+        if out is not sys.stdout:
+            out.close()
+    progress.done()
+    print('last time_edit: %d (use --since %d to export the next changes)' % (watermark, watermark), file=sys.stderr)
+    storage.close()
+
+
+def read(path, fmt):
+    """
+    Yield the rows of an exported file as dicts
+    """
+    f = openfile(path, 'r')
+    try:
+        if fmt == 'csv':
+            for row in csv.DictReader(f):
+                yield dict([(k, v if v != '' else None) for k, v in row.iteritems()])
+        else:
+            for line in f:
+                if line.strip():
+                    yield json.loads(line)
+    finally:
+        if f is not sys.stdin:
+            f.close()
+
+
+def batches(rows, size):
+    """
+    Group the given rows in lists of the given size
+    """
+    batch = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+class Remapper(object):
+    """
+    Translate client ids and demo paths of the imported rows
+    """
+    def __init__(self, args, storage, dialect):
+        self.storage = storage
+        self.guids = args.guids and dialect == 'mysql'
+        self.skip = args.skip_unmapped
+        self.demos = [x.split('=', 1) for x in args.demo_path]
+        self.dropdemos = args.drop_demos
+        self.clients = {}
+        if args.clients:
+            with open(args.clients, 'r') as f:
+                for line in csv.reader(f):
+                    if len(line) == 2 and line[0].strip().isdigit():
+                        self.clients[int(line[0])] = int(line[1])
+
+    def resolve(self, batch):
+        """
+        Return the local client ids of the guids found in the batch (single query)
+        """
+        guids = set([x['guid'] for x in batch if x.get('guid')])
+        if not self.guids or not guids:
+            return {}
+        cursor = self.storage.execute(GUIDS % ', '.join([self.storage.literal(x) for x in guids]))
+        found = {}
+        while not cursor.EOF:
+            found[cursor.getRow()['guid']] = int(cursor.getRow()['id'])
+            cursor.moveNext()
+        return found
+
+    def demo(self, path):
+        """
+        Return the demo path as seen from the importing server
+        """
+        if path is None or self.dropdemos:
+            return None
+        for old, new in self.demos:
+            if path.startswith(old):
+                return new + path[len(old):]
+        return path
+
+    def apply(self, batch):
+        """
+        Return the q5 parameters of the rows of the batch which can be imported
+        """
+        guids = self.resolve(batch)
+        values = []
+        for row in batch:
+            client_id = int(row['client_id'])
+            if row.get('guid') in guids:
+                client_id = guids[row['guid']]
+            elif client_id in self.clients:
+                client_id = self.clients[client_id]
+            elif self.skip:
+                continue
+            values.append((client_id, row['mapname'], int(row['way_id']), int(row['way_time']),
+                           int(row['time_add']), int(row['time_edit']), self.demo(row['demo'])))
+        return values
+
+
+def load(args):
+    """
+    Import the rows of the input file keeping the better times
+    """
+    storage, conn, dialect = connect(args)
+    upgrade(storage)
+    remapper = Remapper(args, storage, dialect)
+    progress = Progress('imported')
+    maps = set()
+    skipped = 0
+    for batch in batches(read(args.file, guessformat(args.file, args.format)), args.batch):
+        values = remapper.apply(batch)
+        skipped += len(batch) - len(values)
+        if values:
+            storage.write([('q5', values)])
+            maps.update([x[1] for x in values])
+        progress.add(len(batch))
+    progress.done()
+    if skipped:
+        print('skipped %d rows of unknown clients' % skipped, file=sys.stderr)
+
+    # Only the map records of the imported maps can have changed
+    for mapname in maps:
+        storage.query('q14', (mapname,))
+        storage.query('q18', (mapname,))
+        storage.query('q42', (mapname, int(time.time())))
+    print('rebuilt the map records of %d maps' % len(maps), file=sys.stderr)
+    if maps:
+        storage.transaction([('q30', ()), ('q29', ())])
+        print('rebuilt the player profiles', file=sys.stderr)
+    storage.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description='export and import the jumper plugin records')
+    parser.add_argument('--host', default='localhost')
+    parser.add_argument('--port', type=int, default=3306)
+    parser.add_argument('--user', default='b3')
+    parser.add_argument('--passwd', default='')
+    parser.add_argument('--db', default='b3')
+    parser.add_argument('--database', help='SQLite database file of the plugin (instead of the B3 MySQL database)')
+    parser.add_argument('--format', choices=['jsonl', 'csv'], help='file format (guessed from the file name by default)')
+    commands = parser.add_subparsers(dest='command')
+
+    p = commands.add_parser('export', help='write the jumpruns into a file')
+    p.add_argument('--since', type=int, default=0, help='only export the jumpruns edited at or after this time_edit '
+                                                           '(runs of the last second of the previous export are exported again)')
+    p.add_argument('file', help="output file ('-' for stdout)")
+
+    p = commands.add_parser('import', help='import the jumpruns of a file keeping the better times')
+    p.add_argument('--batch', type=int, default=1000, help='number of rows written by a single statement')
+    p.add_argument('--guids', action='store_true', help='map clients to the local ones using the exported guids (MySQL only)')
+    p.add_argument('--clients', help="CSV file of 'old client id,new client id' lines")
+    p.add_argument('--skip-unmapped', action='store_true', help='skip the rows of clients not mapped by --guids or --clients')
+    p.add_argument('--demo-path', action='append', default=[], metavar='OLD=NEW', help='rewrite demo paths starting with OLD')
+    p.add_argument('--drop-demos', action='store_true', help='do not import the demo paths')
+    p.add_argument('file', help="input file ('-' for stdin)")
+    args = parser.parse_args()
+
+    if args.command == 'export':
+        export(args)
+    else:
+        load(args)
+
+
+if __name__ == '__main__':
+    main()
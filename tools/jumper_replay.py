@@ -0,0 +1,247 @@
+#!/usr/bin/env python
+#
+# Jumper Plugin for BigBrotherBot(B3) (www.bigbrotherbot.net)
+# Copyright (C) 2013 Fenix <fenix@urbanterror.info)
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the Free Software
+# Foundation, Inc., 51 Franklin St, Fifth Floor, Boston, MA  02110-1301  USA
+
+"""
+Replay the Urban Terror game logs read by B3 (games.log) to backfill the
+jumpruns of runs the plugin missed (B3 stopped, database unavailable) or to
+rebuild them from scratch.
+
+Log files are read line by line (rotated files ending with .gz are gzip
+compressed) and only the best time of every (client, map, way) is kept in
+memory, so multi-GB logs are replayed in constant memory. The best times are
+then written using batches of the multi-row upsert used by the plugin, which
+keeps the better time of a run already stored, and the map records of the
+replayed maps and the player profiles are rebuilt:
+
+    python jumper_replay.py --user b3 --passwd secret games.log.3.gz games.log.2.gz games.log.1 games.log
+    python jumper_replay.py --database jumper.db --clients clients.csv games.log
+
+Clients are identified in the logs by their guid: the guids are resolved
+using the B3 clients table (MySQL only) or a --clients CSV file of
+'guid,client id' lines; runs of unknown guids are skipped. With --replace the
+stored jumpruns of every replayed (client, map) are removed first so the logs
+become the only source of those records.
+
+Game logs only contain the time elapsed since the map start, so the runs are
+dated with the modification time of the log file (or --time). Demos are not
+replayed.
+
+B3 must be importable (run from the B3 directory or set PYTHONPATH).
+"""
+
+from __future__ import print_function
+
+import argparse
+import csv
+import os
+import re
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'extplugins'))
+
+from jumper_records import GUIDS, Progress, batches, connect, openfile, upgrade
+
+# Optional game time prefix ('  12:34 ') followed by the action and its data
+LINE = re.compile(r"""^\s*(?:\d+:\d+\s+)?(?P<action>[a-zA-Z]+):\s*(?P<data>.*?)\s*$""")
+RUN = re.compile(r"""^(?P<cid>\d+)\s*-\s*way:\s*(?P<way_id>\d+)\s*-\s*time:\s*(?P<way_time>\d+)""")
+
+
+class Replay(object):
+    """
+    Parse game logs keeping the best time of every (guid, map, way)
+    """
+    def __init__(self):
+        self.mapname = None
+        self.slots = {}
+        self.best = {}
+        self.runs = 0
+        self.anonymous = 0
+        self.handlers = { 'InitGame' : self.onInitGame,
+                          'ClientUserinfo' : self.onUserinfo,
+                          'ClientDisconnect' : self.onDisconnect,
+                          'ClientJumpRunStopped' : self.onJumpRunStop }
+
+    def parse(self, path, stamp, progress):
+        """
+        Read the given log file line by line
+        """
+        f = openfile(path, 'r')
+        try:
+            count = 0
+            for line in f:
+                count += 1
+                if count == 10000:
+                    progress.add(count)
+                    count = 0
+                # Cheap filter: most lines are kills, items and chat
+                if 'Client' not in line and 'InitGame' not in line:
+                    continue
+                match = LINE.match(line)
+                if match and match.group('action') in self.handlers:
+                    self.handlers[match.group('action')](match.group('data'), stamp)
+            progress.add(count)
+        finally:
+            if f is not sys.stdin:
+                f.close()
+
+    @staticmethod
+    def info(data):
+        """
+        Return the dict of a '\\key\\value' info string
+        """
+        data = data.split('\\')
+        return dict(zip(data[1::2], data[2::2]))
+
+    def onInitGame(self, data, stamp):
+        """
+        Handle a map start (slots are kept: connected clients send their userinfo again)
+        """
+        self.mapname = self.info(data[data.find('\\'):]).get('mapname')
+
+    def onUserinfo(self, data, stamp):
+        """
+        Remember the guid of the client connected on the slot
+        """
+        cid, _, data = data.partition(' ')
+        guid = self.info(data[data.find('\\'):]).get('cl_guid')
+        if guid:
+            self.slots[cid] = guid.upper()
+        else:
+            self.slots.pop(cid, None)
+
+    def onDisconnect(self, data, stamp):
+        """
+        Forget the client connected on the slot
+        """
+        self.slots.pop(data, None)
+
+    def onJumpRunStop(self, data, stamp):
+        """
+        Keep the time of a finished run when it is the best one of the client
+        """
+        match = RUN.match(data)
+        if not match or not self.mapname:
+            return
+        self.runs += 1
+        guid = self.slots.get(match.group('cid'))
+        if not guid:
+            self.anonymous += 1
+            return
+        key = (guid, self.mapname, int(match.group('way_id')))
+        way_time = int(match.group('way_time'))
+        if key not in self.best or way_time < self.best[key][0]:
+            self.best[key] = (way_time, stamp)
+
+
+class Clients(object):
+    """
+    Resolve the client ids of the replayed guids
+    """
+    def __init__(self, args, storage, dialect):
+        self.storage = storage
+        self.query = dialect == 'mysql'
+        self.clients = {}
+        if args.clients:
+            with open(args.clients, 'r') as f:
+                for line in csv.reader(f):
+                    if len(line) == 2 and line[1].strip().isdigit():
+                        self.clients[line[0].strip().upper()] = int(line[1])
+
+    def resolve(self, guids, size):
+        """
+        Return the client ids of the given guids (one query per batch of guids)
+        """
+        found = dict([(x, self.clients[x]) for x in guids if x in self.clients])
+        if self.query:
+            for batch in batches([x for x in guids if x not in found], size):
+                cursor = self.storage.execute(GUIDS % ', '.join([self.storage.literal(x) for x in batch]))
+                while not cursor.EOF:
+                    found[cursor.getRow()['guid'].upper()] = int(cursor.getRow()['id'])
+                    cursor.moveNext()
+        return found
+
+
+def main():
+    parser = argparse.ArgumentParser(description='replay the game logs to backfill or rebuild the jumper plugin records')
+    parser.add_argument('--host', default='localhost')
+    parser.add_argument('--port', type=int, default=3306)
+    parser.add_argument('--user', default='b3')
+    parser.add_argument('--passwd', default='')
+    parser.add_argument('--db', default='b3')
+    parser.add_argument('--database', help='SQLite database file of the plugin (instead of the B3 MySQL database)')
+    parser.add_argument('--batch', type=int, default=5000, help='number of rows written by a single statement')
+    parser.add_argument('--clients', help="CSV file of 'guid,client id' lines (required with --database)")
+    parser.add_argument('--replace', action='store_true', help='remove the stored jumpruns of the replayed clients and maps first')
+    parser.add_argument('--time', type=int, help='date of the replayed runs (modification time of the log file by default)')
+    parser.add_argument('--dry-run', action='store_true', help='parse the logs and report without writing')
+    parser.add_argument('file', nargs='+', help="game log files, oldest first ('-' for stdin)")
+    args = parser.parse_args()
+
+    replay = Replay()
+    progress = Progress('read', 'lines')
+    for path in args.file:
+        stamp = args.time or int(os.path.getmtime(path) if path != '-' else time.time())
+        replay.parse(path, stamp, progress)
+    progress.done()
+    print('%d finished runs, %d of unknown clients, %d best times' % (replay.runs, replay.anonymous, len(replay.best)), file=sys.stderr)
+    if args.dry_run or not replay.best:
+        return
+
+    storage, conn, dialect = connect(args)
+    upgrade(storage)
+    clients = Clients(args, storage, dialect).resolve(set([x[0] for x in replay.best]), args.batch)
+    values = []
+    skipped = 0
+    for (guid, mapname, way_id), (way_time, stamp) in replay.best.iteritems():
+        if guid not in clients:
+            skipped += 1
+            continue
+        values.append((clients[guid], mapname, way_id, way_time, stamp, stamp, None))
+    replay.best.clear()
+    if skipped:
+        print('skipped %d best times of unknown guids' % skipped, file=sys.stderr)
+
+    maps = set([x[1] for x in values])
+    if args.replace:
+        pairs = sorted(set([(x[0], x[1]) for x in values]))
+        for batch in batches(pairs, args.batch):
+            storage.transaction([('q7', x) for x in batch])
+        print('removed the stored jumpruns of %d clients on %d maps' % (len(set([x[0] for x in pairs])), len(maps)), file=sys.stderr)
+
+    progress = Progress('written')
+    for batch in batches(values, args.batch):
+        storage.write([('q5', batch)])
+        progress.add(len(batch))
+    progress.done()
+
+    # Only the map records of the replayed maps can have changed
+    for mapname in maps:
+        storage.query('q14', (mapname,))
+        storage.query('q18', (mapname,))
+        storage.query('q42', (mapname, int(time.time())))
+    print('rebuilt the map records of %d maps' % len(maps), file=sys.stderr)
+    if maps:
+        storage.transaction([('q30', ()), ('q29', ())])
+        print('rebuilt the player profiles', file=sys.stderr)
+    storage.close()
+
+
+if __name__ == '__main__':
+    main()